@@ -1,14 +1,35 @@
+from bisect import bisect_left, insort
+from calendar import isleap
 from collections import UserDict
-from datetime import datetime
+from datetime import date, datetime
 from itertools import islice
+import gc
 import pickle
 import re
 
 
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+
+def is_digits(value: str) -> bool:
+    return value.isascii() and value.isdigit()  # only 0-9, no other Unicode digits
+
+
+def birthday_in_year(birthday: datetime, year: int) -> date:
+    if birthday.month == 2 and birthday.day == 29 and not isleap(year):
+        return date(year, 2, 28)  # Feb 29 birthdays fall on Feb 28 otherwise
+    return date(year, birthday.month, birthday.day)
+
+
 class Field:
+    __slots__ = ("value",)
+
     def __init__(self, value):
-        self.__value = None
-        self.value = value
+        self.value = self._validate(value)
+
+    @classmethod
+    def _validate(cls, value):
+        return value
 
     def __str__(self) -> str:
         return str(self.value)
@@ -17,85 +38,69 @@ class Field:
         return str(self.value)
 
     def __eq__(self, other):
+        if isinstance(other, str):
+            return self.value == other
         return self.value == other.value
 
 
 class Name(Field):
-    @property
-    def value(self):
-        return self.__value
+    __slots__ = ()
 
-    @value.setter
-    def value(self, value):
+    @classmethod
+    def _validate(cls, value):
         if not (value.isnumeric() or len(value) < 3):  # Name validation
-            self.__value = value
-        else:
-            raise ValueError(
-                "Name cannot consist of only digits and min name length is 3."
-            )
+            return value
+        raise ValueError("Name cannot consist of only digits and min name length is 3.")
 
 
 class Birthday(Field):
-    @property
-    def value(self):
-        return self.__value
+    __slots__ = ()
 
-    @value.setter
-    def value(self, value):
-        try:
-            self.__value = datetime.strptime(value, "%d.%m.%Y")  # Date validaiton "."
-            self.__value = datetime.strptime(value, "%d/%m/%Y")  # Date validaiton "/"
+    @classmethod
+    def _validate(cls, value):
+        try:  # Date validation, "/" is accepted as a separator too
+            return datetime.strptime(value.replace("/", "."), "%d.%m.%Y")
         except ValueError:
-            return "use date format DD.MM.YYYY or DD/MM/YYYY"
+            raise ValueError("use date format DD.MM.YYYY or DD/MM/YYYY")
 
     def __str__(self) -> str:
         return datetime.strftime(self.value, "%d.%m.%Y")
 
 
 class Email(Field):
-    @property
-    def value(self):
-        return self.__value
-
-    @value.setter
-    def value(self, value):
-        pattern = (
-            r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"  # Email validation
-        )
-        if re.match(pattern, value):
-            self.__value = value
-        else:
-            raise ValueError("invalid email format")
+    __slots__ = ()
+
+    @classmethod
+    def _validate(cls, value):
+        if EMAIL_PATTERN.match(value):  # Email validation
+            return value
+        raise ValueError("invalid email format")
 
 
 class Phone(Field):
+    __slots__ = ()
     min_len = 5
     max_len = 17
+    strip_chars = str.maketrans("", "", "()-")
 
-    @property
-    def value(self):
-        return self.__value
-
-    @value.setter
-    def value(self, value):
+    @classmethod
+    def _validate(cls, value):
         new_phone = (  # Phone validation
-            value.strip()
-            .removeprefix("+")
-            .replace("(", "")
-            .replace(")", "")
-            .replace("-", "")
+            value.strip().removeprefix("+").translate(cls.strip_chars)
         )
         if (
-            not new_phone.isdecimal()
-            or not Phone.min_len <= len(new_phone) <= Phone.max_len
+            not is_digits(new_phone)
+            or not cls.min_len <= len(new_phone) <= cls.max_len
         ):
             raise ValueError(
-                f" Minimum phone number length is {Phone.min_len} digits. Maximum {Phone.max_len}.Letters not allowed!"
+                f" Minimum phone number length is {cls.min_len} digits. Maximum {cls.max_len}.Letters not allowed!"
             )
-        self.__value = new_phone
+        return new_phone
 
 
 class Record:
+    __slots__ = ("name", "phones", "birthday", "email", "_str_cache")
+
     def __init__(
         self,
         name: Name,
@@ -109,41 +114,38 @@ class Record:
             self.phones.append(phone)
         self.birthday = birthday
         self.email = email
+        self._str_cache = None  # reset by every method that changes the record
 
     def __str__(self):
-        line = "{}: Phones: {}; E-mail: {}; B-day: {} \n"
-        return line.format(
-            self.name,
-            ", ".join([str(phone) for phone in self.phones]),
-            self.email,
-            self.birthday,
-        )
+        if self._str_cache is None:
+            line = "{}: Phones: {}; E-mail: {}; B-day: {} \n"
+            self._str_cache = line.format(
+                self.name,
+                ", ".join([str(phone) for phone in self.phones]),
+                self.email,
+                self.birthday,
+            )
+        return self._str_cache
 
-    def __repr__(self):
-        line = "{}: Phones: {}; E-mail: {}; B-day: {} \n"
-        return line.format(
-            self.name,
-            ", ".join([str(phone) for phone in self.phones]),
-            self.email,
-            self.birthday,
-        )
+    __repr__ = __str__
+
+    def days_left(self, today: date) -> int:
+        compare = birthday_in_year(self.birthday.value, today.year)
+        if compare < today:
+            compare = birthday_in_year(self.birthday.value, today.year + 1)
+        return (compare - today).days
 
-    def days_to_birthday(self) -> int:
+    def days_to_birthday(self, today: date = None) -> int:
         if not self.birthday:
             return "Sorry, no birthdate for this contact"
-        today = datetime.today()
-        compare = self.birthday.value.replace(year=today.year)
-        days = int((compare - today).days)
-        if days > 0:
-            return f"{days} days to birthday"
-        elif today.month == compare.month and today.day == compare.day:
+        days = self.days_left(today or date.today())
+        if not days:
             return "It is TODAY!!!"
-        else:
-            days = int((compare.replace(year=today.year + 1) - today).days)
-            return f"{days} days to birthday"
+        return f"{days} days to birthday"
 
     def add_email(self, email: Email):
         if not self.email:
+            self._str_cache = None
             self.email = email
         else:
             raise IndexError("E-mail already entered")
@@ -151,60 +153,229 @@ class Record:
     def add_phone(self, phone: Phone):
         if phone in self.phones:
             raise IndexError("This phone number already exists")
+        self._str_cache = None
         self.phones.append(phone)
 
     def add_birthday(self, birthday: Birthday):
         if not self.birthday:
+            self._str_cache = None
             self.birthday = birthday
         else:
             raise IndexError("Birthday already entered")
 
+    def del_email(self):
+        self._str_cache = None
+        self.email = None
+
+    def del_birthday(self):
+        self._str_cache = None
+        self.birthday = None
+
     def show_phones(self):
         if not self.phones:
             return "this contact has no phones."
         elif len(self.phones) == 1:
             return f"Current phone number is {self.phones[0]}"
         else:
-            output = "This contact has several phones:\n"
-            for i, phone in enumerate(self.phones, 1):
-                output += f"{i}: {phone} "
-            return output
+            output = "".join(
+                f"{i}: {phone} " for i, phone in enumerate(self.phones, 1)
+            )
+            return "This contact has several phones:\n" + output
 
     def del_phone(self, num=1):
         if not self.phones:
             raise IndexError("this contact has no phones saved")
         else:
+            self._str_cache = None
             return self.phones.pop(num - 1)
 
     def edit_phone(self, phone_new: Phone, num=1):
         if not self.phones:
             raise IndexError("this contact has no phones saved")
         else:
+            self._str_cache = None
             self.phones.pop(num - 1)
             self.phones.insert(num - 1, phone_new)
 
 
+class _PlainUnpickler(pickle.Unpickler):  # builtin containers and scalars only
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"global '{module}.{name}' is forbidden")
+
+
+class _LegacyObject:  # stand-in for Record/Field objects pickled by older versions
+    pass
+
+
+class _LegacyUnpickler(pickle.Unpickler):  # phonebooks saved by older versions
+    legacy_classes = {"Record", "Name", "Phone", "Email", "Birthday"}
+
+    def find_class(self, module, name):
+        if module == "ab_classes" and name in self.legacy_classes:
+            return _LegacyObject
+        if module == "datetime" and name == "datetime":
+            return datetime
+        raise pickle.UnpicklingError(f"global '{module}.{name}' is forbidden")
+
+
+def _legacy_value(field: _LegacyObject):
+    if field is None:
+        return None
+    values = (v for k, v in vars(field).items() if k != "_Field__value")
+    return next(values, None)
+
+
+def _legacy_columns(data: dict) -> dict:
+    columns = {"names": [], "phones": [], "emails": [], "bdays": []}
+    for record in data.values():
+        record = vars(record)
+        bday = _legacy_value(record.get("birthday"))
+        columns["names"].append(_legacy_value(record["name"]))
+        columns["phones"].append(
+            [_legacy_value(phone) for phone in record["phones"] if phone is not None]
+        )
+        columns["emails"].append(_legacy_value(record.get("email")) or "")
+        columns["bdays"].append(bday.strftime("%d.%m.%Y") if bday else "")
+    return columns
+
+
+def _read_columns(db) -> dict:
+    try:
+        data = _PlainUnpickler(db).load()
+    except pickle.UnpicklingError:  # saved by an older version
+        db.seek(0)
+        data = _LegacyUnpickler(db).load()
+    if not isinstance(data, dict):
+        raise pickle.UnpicklingError("not a phonebook file")
+    if data.keys() == {"names", "phones", "emails", "bdays"}:
+        return data
+    try:  # older versions pickled a dict of records, possibly empty
+        return _legacy_columns(data)
+    except (AttributeError, KeyError, TypeError):
+        raise pickle.UnpicklingError("not a phonebook file")
+
+
 class AddressBook(UserDict):
+    def __init__(self, *args, **kwargs):
+        self._phone_index = {}  # phone -> records having it
+        self._phone_keys = []  # sorted phones for prefix search
+        self._name_index = {}  # lowercased name -> records having it
+        super().__init__(*args, **kwargs)
+
+    def _index_phone(self, phone: Phone, record: Record):
+        if phone.value not in self._phone_index:
+            insort(self._phone_keys, phone.value)
+            self._phone_index[phone.value] = []
+        self._phone_index[phone.value].append(record)
+
+    def _unindex_phone(self, phone: Phone, record: Record):
+        records = self._phone_index[phone.value]
+        records.remove(record)
+        if not records:
+            del self._phone_index[phone.value]
+            del self._phone_keys[bisect_left(self._phone_keys, phone.value)]
+
+    def _index_record(self, record: Record):
+        self._name_index.setdefault(record.name.value.lower(), []).append(record)
+        for phone in record.phones:
+            self._index_phone(phone, record)
+
+    def __setitem__(self, contact: str, record: Record):
+        if contact in self.data:
+            del self[contact]
+        self.data[contact] = record
+        self._index_record(record)
+
+    def __delitem__(self, contact: str):
+        record = self.data.pop(contact)
+        records = self._name_index[record.name.value.lower()]
+        records.remove(record)
+        if not records:
+            del self._name_index[record.name.value.lower()]
+        for phone in record.phones:
+            self._unindex_phone(phone, record)
+
+    def _reindex(self):
+        self._phone_index = {}
+        self._phone_keys = []
+        self._name_index = {}
+        for record in self.data.values():
+            self._index_record(record)
+
     def save_to_file(self, filename):
+        records = self.data.values()
+        columns = {
+            "names": [record.name.value for record in records],
+            "phones": [[phone.value for phone in record.phones] for record in records],
+            "emails": [
+                record.email.value if record.email else "" for record in records
+            ],
+            "bdays": [
+                str(record.birthday) if record.birthday else "" for record in records
+            ],
+        }
         with open(filename, "wb") as db:
-            pickle.dump(self.data, db)
+            pickle.dump(columns, db, protocol=pickle.HIGHEST_PROTOCOL)
 
     def load_from_file(self, filename):
-        with open(filename, "rb") as db:
-            self.data = pickle.load(db)
+        gc_was_enabled = gc.isenabled()
+        gc.disable()  # nothing loaded here is cyclic, skip GC passes while building
+        try:
+            with open(filename, "rb") as db:
+                columns = _read_columns(db)
+            self.data = {}
+            for name, phones, email, bday in zip(
+                columns["names"], columns["phones"], columns["emails"], columns["bdays"]
+            ):
+                try:
+                    record = Record(
+                        Name(name),
+                        birthday=Birthday(bday) if bday else None,
+                        email=Email(email) if email else None,
+                    )
+                    record.phones = [Phone(phone) for phone in phones]
+                except ValueError as err:
+                    raise pickle.UnpicklingError(f'contact "{name}": {err}')
+                self.data[name] = record
+            self._reindex()
+        finally:
+            if gc_was_enabled:
+                gc.enable()
 
     def add_record(self, record: Record):
-        self.data.update({record.name.value: record})
+        self[record.name.value] = record
 
     def remove_record(self, contact: str):
-        return self.data.pop(contact)
+        return self.pop(contact)
+
+    def add_phone(self, contact: str, phone: Phone):
+        if phone is None:
+            raise ValueError("enter the phone number to add")
+        record = self.data.get(contact)
+        record.add_phone(phone)
+        self._index_phone(phone, record)
+
+    def del_phone(self, contact: str, num=1):
+        record = self.data.get(contact)
+        phone = record.del_phone(num)
+        self._unindex_phone(phone, record)
+        return phone
+
+    def edit_phone(self, contact: str, phone_new: Phone, num=1):
+        if phone_new is None:
+            raise ValueError("enter the new phone number")
+        record = self.data.get(contact)
+        phone_old = record.phones[num - 1] if record.phones else None
+        record.edit_phone(phone_new, num)
+        self._unindex_phone(phone_old, record)
+        self._index_phone(phone_new, record)
 
     def iterator(self, page):
         start = 0
         while True:
-            output = ""
-            for i in islice(self.data.values(), start, start + page):
-                output += str(i)
+            output = "".join(
+                str(i) for i in islice(self.data.values(), start, start + page)
+            )
             if not output:
                 output = f"Total: {len(self.data)} contacts."
                 yield output
@@ -213,15 +384,39 @@ class AddressBook(UserDict):
             start += page
 
     def show_all(self):
-        output = ""
-        for contact in self.data.values():
-            output += str(contact)
-        output += f"Total: {len(self.data)} contacts."
-        return output if output else "Phonebook is empty"
+        if not self.data:
+            return "Phonebook is empty"
+        output = [str(contact) for contact in self.data.values()]
+        output.append(f"Total: {len(self.data)} contacts.")
+        return "".join(output)
 
     def search(self, pattern: str) -> list:
-        found_recs = []
-        for contact in self.data.values():
-            if pattern in str(contact):
+        if is_digits(pattern):
+            found_recs = {}
+            start = bisect_left(self._phone_keys, pattern)
+            for phone in islice(self._phone_keys, start, None):
+                if not phone.startswith(pattern):
+                    break
+                found_recs.update(dict.fromkeys(self._phone_index[phone]))
+            return list(found_recs)
+        pattern = pattern.lower()
+        found_recs = list(self._name_index.get(pattern, []))  # exact hits first
+        for name, records in self._name_index.items():
+            if pattern in name and name != pattern:
+                found_recs.extend(records)
+        name_hits = set(found_recs)
+        for contact in self.data.values():  # e-mail, birthday, etc.
+            if contact not in name_hits and pattern in str(contact).lower():
                 found_recs.append(contact)
         return found_recs
+
+    def upcoming(self, days: int, today: date = None) -> list:
+        today = today or date.today()
+        found_recs = []
+        for contact in self.data.values():
+            if contact.birthday:
+                days_left = contact.days_left(today)
+                if days_left <= days:
+                    found_recs.append((days_left, contact))
+        found_recs.sort(key=lambda found: found[0])
+        return [contact for _, contact in found_recs]
@@ -1,6 +1,8 @@
 from ab_classes import Name, Phone, Email, Birthday, Record, AddressBook
+from datetime import date
 from functools import wraps
 from pathlib import Path
+import pickle
 import re
 
 
@@ -52,7 +54,7 @@ def add(book: AddressBook, contact: str, phone: str = None):
         book.add_record(rec_new)
         return f'Added contact "{contact}" with phone number: {phone}'
     else:
-        book.get(contact).add_phone(phone_new)
+        book.add_phone(contact, phone_new)
         return f'Updated existing contact "{contact}" with new phone number: {phone}'
 
 
@@ -79,6 +81,17 @@ def congrat(book: AddressBook, *args):
     return rec.days_to_birthday()
 
 
+@input_error
+def birthdays(book: AddressBook, days: str = None, *args):
+    days = int(days) if days else 7
+    today = date.today()
+    result = book.upcoming(days, today)
+    if not result:
+        return f"No birthdays in the next {days} days"
+    output = "\n".join(f"{i.name}: {i.days_to_birthday(today)}" for i in result)
+    return f"Birthdays in the next {days} days:\n" + output
+
+
 @input_error
 def change(book: AddressBook, contact: str, phone: str = None):
     rec = book.get(contact)
@@ -90,7 +103,7 @@ def change(book: AddressBook, contact: str, phone: str = None):
             phone_new = Phone(input("If you want to add the phone enter phone number:"))
         else:
             phone_new = Phone(phone)
-        rec.add_phone(phone_new)
+        book.add_phone(contact, phone_new)
         return f'Changed phone number to {phone_new} for contact "{contact}"'
 
     else:
@@ -103,7 +116,7 @@ def change(book: AddressBook, contact: str, phone: str = None):
         else:
             phone_new = Phone(phone)
         old_phone = rec.phones[num - 1]
-        rec.edit_phone(phone_new, num)
+        book.edit_phone(contact, phone_new, num)
         return (
             f'Changed phone number {old_phone} to {phone_new} for contact "{contact}"'
         )
@@ -114,10 +127,10 @@ def del_phone(book: AddressBook, contact: str, phone=None):
     rec = book.get(contact)
 
     if phone:
-        for i, p in enumerate(rec.phones):
-            if p == phone:
-                num = i + 1
-        else:
+        phone_del = Phone(phone)
+        try:
+            num = rec.phones.index(phone_del) + 1
+        except ValueError:
             raise ValueError("this contact doesn't have such phone number")
     else:
         print(rec.show_phones())
@@ -131,14 +144,14 @@ def del_phone(book: AddressBook, contact: str, phone=None):
                 ).lower()
         else:
             num = int(input("which one do yo want to delete (enter index):"))
-    return f"Phone {rec.del_phone(num)} deleted!"
+    return f"Phone {book.del_phone(contact, num)} deleted!"
 
 
 @input_error
 def del_email(book: AddressBook, *args):
     contact = " ".join(args)
     rec = book.get(contact)
-    rec.email = None
+    rec.del_email()
     return f"Contact {contact}, email deleted"
 
 
@@ -158,7 +171,7 @@ def del_contact(book: AddressBook, *args):
 def del_birthday(book: AddressBook, *args):
     contact = " ".join(args)
     rec = book.get(contact)
-    rec.birthday = None
+    rec.del_birthday()
     return f"Contact {contact}, birthday deleted"
 
 
@@ -189,15 +202,9 @@ def search(book: AddressBook, *args):
     result = book.search(pattern)
     if not result:
         return "not found!"
-    matches = ""
-    for i in result:
-        matches += str(i)
-    frags = matches.split(pattern)
-    highlighted = ""
-    for i, fragment in enumerate(frags):
-        highlighted += fragment
-        if i < len(frags) - 1:
-            highlighted += "\033[42m" + pattern + "\033[0m"
+    matches = "".join(str(i) for i in result)
+    highlight = re.compile(re.escape(pattern), re.IGNORECASE)
+    highlighted = highlight.sub("\033[42m\\g<0>\033[0m", matches)
     return f"Found {len(result)} match(es):\n" + highlighted
 
 
@@ -225,6 +232,7 @@ COMMANDS = {
     "add b_day": add_birthday,
     "add": add,
     "congrat": congrat,
+    "birthdays": birthdays,
     "change": change,
     "phone": phone,
     "show all": show_all,
@@ -240,15 +248,24 @@ COMMANDS = {
 }
 
 
+DISPATCH = {
+    tuple(k.split(" ", 1)) if " " in k else (k, None): v for k, v in COMMANDS.items()
+}
+
+
 @input_error
 def command_parser(line: str):
-    line_prep = " ".join(line.split())
-    for k, v in COMMANDS.items():
-        if line_prep.lower().startswith(k + " ") or line_prep.lower() == k:
-            return v, re.sub(k, "", line_prep, flags=re.IGNORECASE).strip().rsplit(
-                " ", 1
-            )
-    return no_command, []
+    words = line.split()
+    if not words:
+        return no_command, []
+    first = words[0].lower()
+    if len(words) > 1 and (command := DISPATCH.get((first, words[1].lower()))):
+        rest = words[2:]
+    elif command := DISPATCH.get((first, None)):
+        rest = words[1:]
+    else:
+        return no_command, []
+    return command, " ".join(rest).rsplit(" ", 1)
 
 
 is_ended = False
@@ -257,7 +274,11 @@ is_ended = False
 def main():
     book1 = AddressBook()
     if Path(DB_FILE_NAME).exists():
-        book1.load_from_file(DB_FILE_NAME)
+        try:
+            book1.load_from_file(DB_FILE_NAME)
+        except pickle.UnpicklingError as err:
+            print(f"Cannot read {DB_FILE_NAME}: {err}")
+            return
 
     while not is_ended:
         s = input(">>>")
@@ -0,0 +1,83 @@
+import base64
+import os
+import pickle
+import tempfile
+import unittest
+
+from ab_classes import AddressBook
+
+
+# phonebook.bin as saved before the columnar format: a pickled dict of Records
+LEGACY_PHONEBOOK = base64.b64decode(
+    "gASVFwIAAAAAAAB9lCiMA2FhYZSMCmFiX2NsYXNzZXOUjAZSZWNvcmSUk5QpgZR9lCiMBG5h"
+    "bWWUaAKMBE5hbWWUk5QpgZR9lCiMDV9GaWVsZF9fdmFsdWWUTowMX05hbWVfX3ZhbHVllGgB"
+    "dWKMBnBob25lc5RdlGgCjAVQaG9uZZSTlCmBlH2UKGgMTowNX1Bob25lX192YWx1ZZSMBjE1"
+    "NjE1NpR1YmGMCGJpcnRoZGF5lGgCjAhCaXJ0aGRheZSTlCmBlH2UKGgMTowQX0JpcnRoZGF5"
+    "X192YWx1ZZSMCGRhdGV0aW1llIwIZGF0ZXRpbWWUk5RDCgfYBQwAAAAAAACUhZRSlHVijAVl"
+    "bWFpbJROdWKMDkFudG9uIFBldHJlbmtvlGgEKYGUfZQoaAdoCSmBlH2UKGgMTmgNaCN1YmgO"
+    "XZRoESmBlH2UKGgMTmgUjAowOTY4MzM0NTI3lHViYWgWaBgpgZR9lChoDE5oG2geQwoHvQcU"
+    "AAAAAAAAlIWUUpR1YmgiaAKMBUVtYWlslJOUKYGUfZQoaAxOjA1fRW1haWxfX3ZhbHVllIwW"
+    "YW50b24uZHJ1bW1hQGdtYWlsLmNvbZR1YnVijA1PbGVoIFpodXJhdmVslGgEKYGUfZQoaAdo"
+    "CSmBlH2UKGgMTmgNaDd1YmgOXZRoESmBlH2UKGgMTmgUjAswNTAxNTY1MTM1MZR1YmFoFk5o"
+    "Ik51YnUu"
+)
+
+
+class LoadFromFileTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def write(self, data: bytes):
+        with open(self.filename, "wb") as db:
+            db.write(data)
+
+    def test_empty_legacy_file(self):
+        self.write(pickle.dumps({}))
+        book = AddressBook()
+        book.load_from_file(self.filename)
+        self.assertEqual(len(book), 0)
+
+    def test_populated_legacy_file(self):
+        self.write(LEGACY_PHONEBOOK)
+        book = AddressBook()
+        book.load_from_file(self.filename)
+        self.assertEqual(list(book), ["aaa", "Anton Petrenko", "Oleh Zhuravel"])
+        anton = book["Anton Petrenko"]
+        self.assertEqual(anton.phones, ["0968334527"])
+        self.assertEqual(anton.email.value, "anton.drumma@gmail.com")
+        self.assertEqual(str(anton.birthday), "20.07.1981")
+        self.assertIsNone(book["Oleh Zhuravel"].birthday)
+        self.assertEqual(book.search("0968"), [anton])
+
+    def test_legacy_file_is_saved_in_new_format(self):
+        self.write(LEGACY_PHONEBOOK)
+        book = AddressBook()
+        book.load_from_file(self.filename)
+        book.save_to_file(self.filename)
+        reloaded = AddressBook()
+        reloaded.load_from_file(self.filename)
+        self.assertEqual(reloaded.show_all(), book.show_all())
+
+    def test_not_a_phonebook(self):
+        self.write(pickle.dumps(["aaa", "bbb"]))
+        with self.assertRaises(pickle.UnpicklingError):
+            AddressBook().load_from_file(self.filename)
+
+    def test_invalid_value_names_the_contact(self):
+        columns = {
+            "names": ["Anton Petrenko"],
+            "phones": [["\u0660\u0669\u0666\u0668\u0663\u0663"]],
+            "emails": [""],
+            "bdays": [""],
+        }
+        self.write(pickle.dumps(columns))
+        with self.assertRaisesRegex(pickle.UnpicklingError, "Anton Petrenko"):
+            AddressBook().load_from_file(self.filename)
+
+
+if __name__ == "__main__":
+    unittest.main()